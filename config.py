@@ -1,6 +1,6 @@
 CONFIG = {
     # TRADING PARAMETERS
-    'SYMBOL': 'BTC/USD',
+    'SYMBOLS': ['BTC/USD'],
     'TIMEFRAME': '5Min',
     'MIN_CANDLES_REQUIRED': 30,
     'RISK_PER_TRADE': 0.01,
@@ -28,7 +28,9 @@ CONFIG = {
     'DRY_RUN': True,
     'LOG_SIGNALS_ONLY': True,
     'CANDLE_HISTORY': 200,
-    'DATA_CHECK_INTERVAL': 1,
+    'LOG_LEVEL': 'INFO',
+    'LOG_FILE': 'bzcae.log',
+    'NET_TIMEOUT': 15.0,
     
     # DISCORD NOTIFICATIONS
     'ENABLE_DISCORD': True,
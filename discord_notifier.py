@@ -1,14 +1,18 @@
 import discord
 import asyncio
+import logging
 from datetime import datetime
 
+log = logging.getLogger('bzcae')
+
 
 class DiscordNotifier:
     """Send trading updates to Discord"""
     
-    def __init__(self, token, channel_id):
+    def __init__(self, token, channel_id, symbols=('BTC/USD',)):
         self.token = token
         self.channel_id = int(channel_id)
+        self.symbols = list(symbols)
         self.client = None
         self.channel = None
         self.ready = False
@@ -20,13 +24,13 @@ class DiscordNotifier:
         
         @self.client.event
         async def on_ready():
-            print(f"✓ Discord bot connected as {self.client.user}")
+            log.info("✓ Discord bot connected as %s", self.client.user)
             self.channel = self.client.get_channel(self.channel_id)
             if self.channel:
                 self.ready = True
                 await self.send_startup_message()
             else:
-                print(f"❌ Channel {self.channel_id} not found")
+                log.error("❌ Channel %s not found", self.channel_id)
         
         asyncio.create_task(self.client.start(self.token))
         
@@ -37,13 +41,14 @@ class DiscordNotifier:
     
     async def send_startup_message(self):
         """Send bot startup notification"""
+        symbols = ", ".join(self.symbols)
         embed = discord.Embed(
             title="🤖 BZ-CAE Trading Bot Started",
-            description="Monitoring BTC/USD for divergence signals",
+            description=f"Monitoring {symbols} for divergence signals",
             color=discord.Color.green(),
             timestamp=datetime.utcnow()
         )
-        embed.add_field(name="Symbol", value="BTC/USD", inline=True)
+        embed.add_field(name="Symbols" if len(self.symbols) > 1 else "Symbol", value=symbols, inline=True)
         embed.add_field(name="Timeframe", value="5 Minutes", inline=True)
         embed.add_field(name="Status", value="Collecting initial candles...", inline=False)
         
@@ -57,9 +62,10 @@ class DiscordNotifier:
         
         color = discord.Color.green() if signal['type'] == 'BULLISH' else discord.Color.red()
         emoji = "🟢" if signal['type'] == 'BULLISH' else "🔴"
+        label = f"{signal['symbol']} {signal['type']}" if 'symbol' in signal else signal['type']
         
         embed = discord.Embed(
-            title=f"{emoji} {signal['type']} DIVERGENCE DETECTED",
+            title=f"{emoji} {label} DIVERGENCE DETECTED",
             description=f"Confidence: **{signal['confidence']:.0%}**",
             color=color,
             timestamp=datetime.utcnow()
@@ -72,6 +78,29 @@ class DiscordNotifier:
         
         await self.channel.send(embed=embed)
     
+    async def send_signals(self, signals, account_balance):
+        """Send several signals as one combined notification"""
+        if not self.ready:
+            return
+        
+        embed = discord.Embed(
+            title=f"🚨 {len(signals)} DIVERGENCE SIGNALS DETECTED",
+            color=discord.Color.gold(),
+            timestamp=datetime.utcnow()
+        )
+        
+        for signal in signals:
+            emoji = "🟢" if signal['type'] == 'BULLISH' else "🔴"
+            label = f"{signal['symbol']} {signal['type']}" if 'symbol' in signal else signal['type']
+            embed.add_field(
+                name=f"{emoji} {label} ({signal['confidence']:.0%})",
+                value=f"Price: ${signal['price']:,.2f} | RSI: {signal['rsi']:.1f} | ATR: ${signal['atr']:.2f}",
+                inline=False
+            )
+        embed.add_field(name="Account Balance", value=f"${account_balance:,.2f}", inline=False)
+        
+        await self.channel.send(embed=embed)
+    
     async def send_trading_enabled(self, num_candles):
         """Send trading enabled notification"""
         if not self.ready:
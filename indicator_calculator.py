@@ -1,5 +1,87 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: leave the function as plain Python"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True)
+def compute_all(open_, high, low, close, rsi_p, atr_p, a1, a2, a3):
+    """Single pass over OHLC arrays returning rsi, atr and three EMAs (a1-a3 are the EMA alphas)"""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    atr = np.full(n, np.nan)
+    ema1 = np.empty(n)
+    ema2 = np.empty(n)
+    ema3 = np.empty(n)
+    gains = np.empty(n)
+    losses = np.empty(n)
+    ranges = np.empty(n)
+    
+    # Running window sums: add row i, subtract row i - period. The nonzero
+    # counts reset a sum to exactly 0 once its window holds no moves, so
+    # rounding residue can't turn a flat window into a spurious RSI
+    gain_sum = 0.0
+    loss_sum = 0.0
+    tr_sum = 0.0
+    gain_ct = 0
+    loss_ct = 0
+    
+    for i in range(n):
+        if i == 0:
+            ema1[i] = close[i]
+            ema2[i] = close[i]
+            ema3[i] = close[i]
+            # Same rolling-mean windows as the pandas versions, the first delta counts as 0
+            delta = 0.0
+            ranges[i] = high[i] - low[i]
+        else:
+            ema1[i] = a1 * close[i] + (1 - a1) * ema1[i - 1]
+            ema2[i] = a2 * close[i] + (1 - a2) * ema2[i - 1]
+            ema3[i] = a3 * close[i] + (1 - a3) * ema3[i - 1]
+            delta = close[i] - close[i - 1]
+            ranges[i] = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        
+        gains[i] = delta if delta > 0 else 0.0
+        losses[i] = -delta if delta < 0 else 0.0
+        gain_sum += gains[i]
+        loss_sum += losses[i]
+        tr_sum += ranges[i]
+        if gains[i] > 0:
+            gain_ct += 1
+        if losses[i] > 0:
+            loss_ct += 1
+        
+        j = i - rsi_p
+        if j >= 0:
+            gain_sum -= gains[j]
+            loss_sum -= losses[j]
+            if gains[j] > 0:
+                gain_ct -= 1
+            if losses[j] > 0:
+                loss_ct -= 1
+        if gain_ct == 0:
+            gain_sum = 0.0
+        if loss_ct == 0:
+            loss_sum = 0.0
+        if i >= rsi_p - 1 and loss_sum > 0:
+            rs = (gain_sum / rsi_p) / (loss_sum / rsi_p)
+            rsi[i] = 100 - (100 / (1 + rs))
+        
+        j = i - atr_p
+        if j >= 0:
+            tr_sum -= ranges[j]
+        if i >= atr_p - 1:
+            atr[i] = tr_sum / atr_p
+    
+    return rsi, atr, ema1, ema2, ema3
 
 
 class IndicatorCalculator:
@@ -37,9 +119,10 @@ class IndicatorCalculator:
         if index < lookback or index >= len(highs) - lookback:
             return False
         
-        current = highs.iloc[index]
+        values = np.asarray(highs)
+        current = values[index]
         for i in range(index - lookback, index + lookback + 1):
-            if i != index and highs.iloc[i] >= current:
+            if i != index and values[i] >= current:
                 return False
         return True
     
@@ -49,8 +132,81 @@ class IndicatorCalculator:
         if index < lookback or index >= len(lows) - lookback:
             return False
         
-        current = lows.iloc[index]
+        values = np.asarray(lows)
+        current = values[index]
         for i in range(index - lookback, index + lookback + 1):
-            if i != index and lows.iloc[i] <= current:
+            if i != index and values[i] <= current:
                 return False
-        return True
\ No newline at end of file
+        return True
+
+
+class IncrementalIndicators:
+    """Running RSI/ATR/EMA state, updated one candle at a time"""
+    
+    # Matches the IndicatorCalculator series methods (rolling-mean RSI/ATR,
+    # adjust=False EMAs) but costs O(1) per candle instead of O(history)
+    COLUMNS = ('rsi', 'atr', 'ema20', 'ema50', 'ema100')
+    
+    def __init__(self, rsi_period=11, atr_period=14, ema_periods=(20, 50, 100), ema_alphas=None):
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.ema_periods = tuple(ema_periods)
+        self.ema_alphas = list(ema_alphas or [2.0 / (p + 1) for p in ema_periods])
+        self.gains = deque(maxlen=rsi_period)
+        self.losses = deque(maxlen=rsi_period)
+        self.true_ranges = deque(maxlen=atr_period)
+        self.emas = [None] * len(ema_periods)
+        self.prev_close = None
+    
+    def _push(self, high, low, close):
+        """Advance the RSI/ATR windows by one candle"""
+        if self.prev_close is None:
+            delta = 0.0
+            true_range = high - low
+        else:
+            delta = close - self.prev_close
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        
+        self.gains.append(max(delta, 0.0))
+        self.losses.append(max(-delta, 0.0))
+        self.true_ranges.append(true_range)
+    
+    def seed(self, open_, high, low, close):
+        """Compute full indicator columns for a history and take over its running state"""
+        columns = compute_all(open_, high, low, close,
+                              self.rsi_period, self.atr_period, *self.ema_alphas)
+        
+        n = len(close)
+        tail = min(n, max(self.rsi_period, self.atr_period))
+        self.prev_close = close[n - tail - 1] if n > tail else None
+        self.gains.clear()
+        self.losses.clear()
+        self.true_ranges.clear()
+        for i in range(n - tail, n):
+            self._push(high[i], low[i], close[i])
+        if n:
+            self.emas = [float(col[-1]) for col in columns[2:]]
+        
+        return dict(zip(self.COLUMNS, columns))
+    
+    def update(self, open_, high, low, close):
+        """Fold in one completed candle and return the latest indicator values"""
+        self._push(high, low, close)
+        
+        rsi = np.nan
+        if len(self.gains) == self.rsi_period:
+            avg_loss = sum(self.losses) / self.rsi_period
+            if avg_loss != 0:
+                rs = (sum(self.gains) / self.rsi_period) / avg_loss
+                rsi = 100 - (100 / (1 + rs))
+        
+        atr = np.nan
+        if len(self.true_ranges) == self.atr_period:
+            atr = sum(self.true_ranges) / self.atr_period
+        
+        for i, alpha in enumerate(self.ema_alphas):
+            prev = self.emas[i]
+            self.emas[i] = close if prev is None else alpha * close + (1 - alpha) * prev
+        
+        return dict(zip(self.COLUMNS, [rsi, atr] + self.emas))
\ No newline at end of file
@@ -1,25 +1,45 @@
+import asyncio
+import logging
+import numpy as np
 import pandas as pd
 from alpaca.data.historical.crypto import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoLatestQuoteRequest
+from alpaca.data.live.crypto import CryptoDataStream
+from alpaca.data.requests import CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from datetime import datetime, timedelta, timezone
 
+log = logging.getLogger('bzcae')
 
-class LiveDataCollector:
-    """Collect live 5-minute OHLCV candles"""
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class CandleSeries:
+    """Completed candles and the forming candle for one symbol"""
     
-    def __init__(self, api_key, api_secret, symbol='BTC/USD'):
-        self.client = CryptoHistoricalDataClient(api_key, api_secret)
+    def __init__(self, symbol, max_history=500):
         self.symbol = symbol
-        self.candles = []
-        self.current_candle = None
+        # Room for two windows, compacted back to one when full
+        self.max_history = max_history
+        self.buf = self._allocate(2 * max_history)
+        self.extra_columns = []
+        self.n = 0
+        self.dropped = 0
+        self.current_candle = self._empty_candle()
         self.candle_start = None
-        self.interval = timedelta(minutes=5)
-        
-    def start_collection(self):
-        """Start collecting candles"""
-        print(f"🚀 Starting live 5-minute candle collection for {self.symbol}")
-        self.candle_start = datetime.now(timezone.utc)
-        self.current_candle = {
+        # The stream joins partway through its first interval, so that candle is incomplete
+        self._partial = True
+        self._last_quote_ts = None
+    
+    @staticmethod
+    def _allocate(size):
+        """Allocate one column array per candle field"""
+        buf = {k: np.empty(size, dtype=np.float64) for k in CANDLE_COLUMNS}
+        buf['ts'] = np.empty(size, dtype='datetime64[ns]')
+        return buf
+    
+    @staticmethod
+    def _empty_candle():
+        return {
             'open': None,
             'high': None,
             'low': None,
@@ -27,81 +47,228 @@ class LiveDataCollector:
             'volume': 0
         }
     
-    def update(self):
-        """Update current candle with latest quote"""
-        try:
-            request = CryptoLatestQuoteRequest(symbol_or_symbols=self.symbol)
-            quote = self.client.get_crypto_latest_quote(request).get(self.symbol)
-            
-            if not quote:
-                return False
-            
-            price = (quote.bid_price + quote.ask_price) / 2
-            vol = (quote.bid_size + quote.ask_size) / 2
-            
-            now = datetime.now(timezone.utc)
-            
-            if now - self.candle_start >= self.interval:
-                if self.current_candle['open'] is not None:
-                    candle_data = {
-                        'timestamp': self.candle_start,
-                        'open': self.current_candle['open'],
-                        'high': self.current_candle['high'],
-                        'low': self.current_candle['low'],
-                        'close': self.current_candle['close'],
-                        'volume': round(self.current_candle['volume'], 6)
-                    }
-                    self.candles.append(candle_data)
-                    
-                    print(f"✓ Candle #{len(self.candles)}: "
-                          f"O:{candle_data['open']:.2f} H:{candle_data['high']:.2f} "
-                          f"L:{candle_data['low']:.2f} C:{candle_data['close']:.2f}")
-                    
-                    self.candle_start = now
-                    self.current_candle = {
-                        'open': price,
-                        'high': price,
-                        'low': price,
-                        'close': price,
-                        'volume': vol
-                    }
-                    return True
-                else:
-                    self.candle_start = now
-                    self.current_candle = {
-                        'open': price,
-                        'high': price,
-                        'low': price,
-                        'close': price,
-                        'volume': vol
-                    }
+    def append_candle(self, ts, open_, high, low, close, volume):
+        """Write a completed candle into the column buffers"""
+        if self.n == len(self.buf['ts']):
+            # Move the newest window into fresh arrays so frames already handed out stay valid
+            keep = self.max_history - 1
+            compacted = {}
+            for k, v in self.buf.items():
+                compacted[k] = np.empty_like(v)
+                compacted[k][:keep] = v[self.n - keep:self.n]
+            self.buf = compacted
+            self.dropped += self.n - keep
+            self.n = keep
+        
+        i = self.n
+        self.buf['ts'][i] = np.datetime64(ts.astimezone(timezone.utc).replace(tzinfo=None), 'ns')
+        self.buf['open'][i] = open_
+        self.buf['high'][i] = high
+        self.buf['low'][i] = low
+        self.buf['close'][i] = close
+        self.buf['volume'][i] = volume
+        for k in self.extra_columns:
+            self.buf[k][i] = np.nan
+        self.n += 1
+    
+    def add_quote(self, ts, bucket, price, vol):
+        """Fold a quote into the forming candle, returns True when it closed a candle"""
+        # Redelivered quotes (e.g. after a reconnect) would count their volume twice
+        if self._last_quote_ts is not None and ts <= self._last_quote_ts:
+            return False
+        if self._last_quote_ts is None:
+            # A bar seeded from the backfill already covers the start of the stream's first interval
+            if self.candle_start is not None and bucket == self.candle_start:
+                self._partial = False
             else:
-                if self.current_candle['open'] is None:
-                    self.current_candle['open'] = price
-                    self.current_candle['high'] = price
-                    self.current_candle['low'] = price
-                else:
-                    self.current_candle['high'] = max(self.current_candle['high'], price)
-                    self.current_candle['low'] = min(self.current_candle['low'], price)
+                self.current_candle = self._empty_candle()
+                self.candle_start = None
+        self._last_quote_ts = ts
+        
+        closed = False
+        if self.candle_start is not None and bucket > self.candle_start:
+            candle = self.current_candle
+            if self._partial:
+                log.debug("%s dropped partial first candle at %s", self.symbol, self.candle_start)
+                self._partial = False
+            elif candle['open'] is not None:
+                self.append_candle(self.candle_start, candle['open'], candle['high'],
+                                   candle['low'], candle['close'],
+                                   round(candle['volume'], 6))
                 
-                self.current_candle['close'] = price
-                self.current_candle['volume'] += vol
-            
-            return False
+                log.info("✓ %s Candle #%d: O:%.2f H:%.2f L:%.2f C:%.2f", self.symbol,
+                         self.total_candles, candle['open'], candle['high'],
+                         candle['low'], candle['close'])
+                closed = True
             
-        except Exception as e:
-            print(f"⚠ Error fetching quote: {e}")
-            return False
+            self.current_candle = self._empty_candle()
+        
+        self.candle_start = bucket
+        
+        if self.current_candle['open'] is None:
+            self.current_candle['open'] = price
+            self.current_candle['high'] = price
+            self.current_candle['low'] = price
+        else:
+            self.current_candle['high'] = max(self.current_candle['high'], price)
+            self.current_candle['low'] = min(self.current_candle['low'], price)
+        
+        self.current_candle['close'] = price
+        self.current_candle['volume'] += vol
+        return closed
+    
+    def seed_candle(self, ts, open_, high, low, close, volume):
+        """Start the forming candle from a partial historical bar for its interval"""
+        self.candle_start = ts
+        self.current_candle = {
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume
+        }
+    
+    def add_columns(self, *names):
+        """Add NaN-filled float columns alongside the OHLCV buffers"""
+        for k in names:
+            if k not in self.buf:
+                self.buf[k] = np.full(len(self.buf['ts']), np.nan)
+                self.extra_columns.append(k)
+    
+    def set_values(self, i, **values):
+        """Write values into row (or slice) i of the named columns"""
+        for k, v in values.items():
+            self.buf[k][i] = v
+    
+    def window(self, size, end=None):
+        """Views on the newest size candles (before buffer row end) of every column, plus their timestamps"""
+        end = self.n if end is None else end
+        rows = slice(max(0, end - min(size, self.max_history)), end)
+        data = {k: self.buf[k][rows] for k in list(CANDLE_COLUMNS) + self.extra_columns}
+        data['ts'] = pd.DatetimeIndex(self.buf['ts'][rows], tz='UTC', name='timestamp')
+        return data
     
     def get_dataframe(self):
-        """Get candles as DataFrame"""
-        if not self.candles:
+        """Get candles as DataFrame (columns are views on the buffers)"""
+        if not self.n:
+            return None
+        
+        data = self.window(self.max_history)
+        index = data.pop('ts')
+        return pd.DataFrame(data, index=index, copy=False)
+    
+    @property
+    def total_candles(self):
+        """Candles collected since start, including ones dropped from history"""
+        return self.dropped + self.n
+    
+    def __len__(self):
+        return min(self.n, self.max_history)
+
+
+class LiveDataCollector:
+    """Collect live 5-minute OHLCV candles for one or more symbols"""
+    
+    def __init__(self, api_key, api_secret, symbols=('BTC/USD',), max_history=500):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        self.client = CryptoHistoricalDataClient(api_key, api_secret)
+        self.stream = CryptoDataStream(api_key, api_secret)
+        self.stream.subscribe_quotes(self._on_quote, *symbols)
+        self.stream_task = None
+        self.symbols = list(symbols)
+        self.max_history = max_history
+        self.series = {sym: CandleSeries(sym, max_history) for sym in self.symbols}
+        self.interval = timedelta(minutes=5)
+        self.lock = asyncio.Lock()
+        self.new_candle_event = asyncio.Event()
+    
+    def fetch_bars(self, candles=None):
+        """Fetch recent historical bars for every symbol in one request, None on error"""
+        # Default to a full history window, anything older would be dropped straight away
+        candles = min(candles or self.max_history, self.max_history)
+        now = datetime.now(timezone.utc)
+        try:
+            request = CryptoBarsRequest(
+                symbol_or_symbols=self.symbols,
+                timeframe=TimeFrame(int(self.interval.total_seconds() // 60), TimeFrameUnit.Minute),
+                start=now - self.interval * (candles + 1),
+                # Caps pagination: one window per symbol, plus the bar still forming
+                limit=(candles + 1) * len(self.symbols)
+            )
+            return self.client.get_crypto_bars(request).df
+        except Exception as e:
+            log.warning("⚠ Error fetching historical bars: %s", e)
             return None
+    
+    def load_bars(self, bars):
+        """Append fetched bars to each symbol's history, returns the number loaded"""
+        if bars is None or bars.empty:
+            return 0
         
-        df = pd.DataFrame(self.candles)
-        df.set_index('timestamp', inplace=True)
-        return df
+        # The bar for the current interval is still forming, the stream merges its quotes into it
+        current_bucket = self._candle_bucket(datetime.now(timezone.utc))
+        loaded = 0
+        for symbol, rows in bars.groupby(level='symbol'):
+            series = self.series.get(symbol)
+            if series is None:
+                continue
+            for row in rows.droplevel('symbol').itertuples():
+                if row.Index >= current_bucket:
+                    series.seed_candle(row.Index.to_pydatetime(), row.open, row.high,
+                                       row.low, row.close, row.volume)
+                    continue
+                series.append_candle(row.Index, row.open, row.high, row.low, row.close, row.volume)
+                loaded += 1
+        return loaded
+    
+    def start_collection(self):
+        """Start collecting candles from the quote stream"""
+        log.info("🚀 Starting live 5-minute candle collection for %s", ", ".join(self.symbols))
+        self.stream_task = asyncio.create_task(self.stream._run_forever())
+    
+    async def stop_collection(self):
+        """Stop the quote stream"""
+        if self.stream_task:
+            await self.stream.stop_ws()
+            self.stream_task.cancel()
+            self.stream_task = None
+    
+    def add_columns(self, *names):
+        """Add NaN-filled float columns to every symbol's buffers"""
+        for series in self.series.values():
+            series.add_columns(*names)
+    
+    def _candle_bucket(self, ts):
+        """Start of the interval that ts falls into"""
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        return ts - (ts - epoch) % self.interval
+    
+    async def _on_quote(self, quote):
+        """Update the symbol's current candle with a streamed quote"""
+        try:
+            series = self.series.get(quote.symbol)
+            if series is None:
+                return
+            
+            price = (quote.bid_price + quote.ask_price) / 2
+            vol = (quote.bid_size + quote.ask_size) / 2
+            bucket = self._candle_bucket(quote.timestamp)
+            
+            async with self.lock:
+                if series.add_quote(quote.timestamp, bucket, price, vol):
+                    self.new_candle_event.set()
+        
+        except Exception as e:
+            log.warning("⚠ Error processing quote: %s", e)
+    
+    def get_dataframe(self, symbol=None):
+        """Get candles for a symbol (default: the first) as DataFrame"""
+        return self.series[symbol or self.symbols[0]].get_dataframe()
+    
+    def __len__(self):
+        return min(len(series) for series in self.series.values())
     
     def has_minimum_candles(self, min_count):
-        """Check if we have enough candles"""
-        return len(self.candles) >= min_count
\ No newline at end of file
+        """Check if every symbol has enough candles"""
+        return len(self) >= min_count
\ No newline at end of file
@@ -1,18 +1,28 @@
 import asyncio
+import concurrent.futures
+import copy
+import functools
+import logging
 import time
+from types import SimpleNamespace
 from alpaca.trading.client import TradingClient
 
 from config import CONFIG
-from utils import load_all_keys
+from utils import load_all_keys, configure_http_pool, setup_logging
 from live_data_collector import LiveDataCollector
 from discord_notifier import DiscordNotifier
 from signal_detector import SignalDetector
-from indicator_calculator import IndicatorCalculator
+from indicator_calculator import IncrementalIndicators
+
+log = logging.getLogger('bzcae')
 
 
 class IntegratedLiveTrader:
     """Complete trading bot with Discord and live data"""
     
+    NOTIFY_BATCH = 10
+    NOTIFY_MAX_AGE = 30
+    
     def __init__(self, config):
         self.config = config
         
@@ -24,140 +34,359 @@ class IntegratedLiveTrader:
             raise ValueError("API keys not found in keys.env")
         
         self.trading_client = TradingClient(api_key, api_secret, paper=True)
-        self.data_collector = LiveDataCollector(api_key, api_secret, config['SYMBOL'])
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        # Bounded history: indicators only look back as far as the slowest EMA,
+        # unless CANDLE_HISTORY asks for more. Backfill fills the same window
+        max_history = max(max(config['MIN_CANDLES_REQUIRED'], config['EMA_SLOW']) * 2,
+                          config.get('CANDLE_HISTORY', 0))
+        self.symbols = list(config.get('SYMBOLS') or [config['SYMBOL']])
+        self.data_collector = LiveDataCollector(api_key, api_secret, self.symbols,
+                                                max_history=max_history)
+        # Bound every Alpaca/Discord call so one stalled request can't hang the loop
+        self.net_timeout = config.get('NET_TIMEOUT', 15.0)
+        configure_http_pool(self.trading_client, timeout=self.net_timeout)
+        configure_http_pool(self.data_collector.client, timeout=self.net_timeout)
+        
+        # Indicator parameters resolved once instead of per candle
+        self.rsi_period = int(config['RSI_PERIOD'])
+        self.atr_period = int(config['ATR_PERIOD'])
+        self.ema_periods = (config['EMA_FAST'], config['EMA_MID'], config['EMA_SLOW'])
+        self.alpha_fast = 2.0 / (config['EMA_FAST'] + 1)
+        self.alpha_mid = 2.0 / (config['EMA_MID'] + 1)
+        self.alpha_slow = 2.0 / (config['EMA_SLOW'] + 1)
+        self.detect_window = 2 * config['PIVOT_LOOKBACK'] + 1
+        
+        # Per-symbol running indicator state, written back into the collector's columns
+        self.indicators = {}
+        self.state = {}
+        self._indicator_rows = {}
+        for symbol in self.symbols:
+            self.indicators[symbol] = IncrementalIndicators(
+                self.rsi_period, self.atr_period, self.ema_periods,
+                (self.alpha_fast, self.alpha_mid, self.alpha_slow)
+            )
+            # Latest candle and indicator values as plain scalars
+            self.state[symbol] = SimpleNamespace(price=0.0, rsi=0.0, atr=0.0, ema20=0.0, ema50=0.0,
+                                                 ema100=0.0, ts=None, bar=-1, history=0)
+            self._indicator_rows[symbol] = 0
+        self.data_collector.add_columns(*IncrementalIndicators.COLUMNS)
+        
+        # Account/positions snapshot, shared by signal and status messages
+        self._account_cache = None
+        self._account_cache_time = 0
+        self.account_cache_ttl = min(self.data_collector.interval.total_seconds(), 60)
         
         self.discord = None
         if config.get('ENABLE_DISCORD'):
             discord_token = keys.get('DISCORD_TOKEN')
             discord_channel = keys.get('DISCORD_CHANNEL_ID')
             if discord_token and discord_channel:
-                self.discord = DiscordNotifier(discord_token, discord_channel)
+                self.discord = DiscordNotifier(discord_token, discord_channel, self.symbols)
+        
+        # Discord messages are queued and sent by _notifier_loop off the trading loop
+        self._notify_q = asyncio.Queue()
+        self._notifier_task = None
         
         self.trading_enabled = False
         self.running = False
         self.last_discord_update = time.time()
-        self.signal_detector = None
+        self.signal_detectors = {}
     
     async def initialize(self):
         """Initialize bot"""
-        print("\n" + "="*70)
-        print("BZ-CAE INTEGRATED LIVE TRADING BOT")
-        print("="*70)
-        print(f"Symbol: {self.config['SYMBOL']}")
-        print(f"Min Candles Required: {self.config['MIN_CANDLES_REQUIRED']}")
-        print(f"Discord: {self.config.get('ENABLE_DISCORD', False)}")
-        print(f"DRY RUN: {self.config['DRY_RUN']}")
-        print(f"LOG ONLY: {self.config['LOG_SIGNALS_ONLY']}")
-        print("="*70 + "\n")
+        log.info("\n" + "="*70)
+        log.info("BZ-CAE INTEGRATED LIVE TRADING BOT")
+        log.info("="*70)
+        log.info("Symbols: %s", ", ".join(self.symbols))
+        log.info("Min Candles Required: %d", self.config['MIN_CANDLES_REQUIRED'])
+        log.info("Discord: %s", self.config.get('ENABLE_DISCORD', False))
+        log.info("DRY RUN: %s", self.config['DRY_RUN'])
+        log.info("LOG ONLY: %s", self.config['LOG_SIGNALS_ONLY'])
+        log.info("="*70 + "\n")
         
         if self.discord:
             try:
-                await self.discord.start()
+                await self._timed(self.discord.start(), "Discord start")
             except Exception as e:
-                print(f"⚠️  Discord failed: {e}")
+                log.warning("⚠️  Discord failed: %s", e)
                 self.discord = None
         
+        if self.discord:
+            self._notifier_task = asyncio.create_task(self._notifier_loop())
+        
         try:
-            account = self.trading_client.get_account()
-            print(f"✓ Connected to Alpaca Paper Trading")
-            print(f"  Portfolio: ${float(account.portfolio_value):,.2f}\n")
+            account = await self._timed(self._run_blocking(self.trading_client.get_account),
+                                        "Alpaca get_account")
+            if account is None:
+                raise ConnectionError("no response from Alpaca")
+            log.info("✓ Connected to Alpaca Paper Trading")
+            if log.isEnabledFor(logging.INFO):
+                log.info("  Portfolio: $%s\n", f"{float(account.portfolio_value):,.2f}")
         except Exception as e:
-            print(f"❌ Alpaca Error: {e}")
+            log.error("❌ Alpaca Error: %s", e)
             raise
     
     async def run(self):
         """Main bot loop"""
         self.running = True
-        await self.initialize()
-        
-        self.data_collector.start_collection()
-        
-        print(f"📊 Collecting {self.config['MIN_CANDLES_REQUIRED']} candles...")
-        print(f"   ~{self.config['MIN_CANDLES_REQUIRED'] * 5} minutes")
-        print("   Press Ctrl+C to stop\n")
-        
         try:
+            await self.initialize()
+            
+            # Only the fetch is timed: an abandoned fetch just returns a frame nobody reads,
+            # while load_bars writes the candle buffers and must not outlive the await
+            bars = await self._timed(self._run_blocking(self.data_collector.fetch_bars),
+                                     "Historical backfill")
+            loaded = await self._run_blocking(self.data_collector.load_bars, bars)
+            log.info("✓ Backfilled %d historical candles", loaded)
+            
+            self.data_collector.start_collection()
+            
+            remaining = self.config['MIN_CANDLES_REQUIRED'] - len(self.data_collector)
+            if remaining > 0:
+                log.info("📊 Collecting %d more candles...", remaining)
+                log.info("   ~%d minutes", remaining * 5)
+            log.info("   Press Ctrl+C to stop\n")
+            
+            self._check_trading_enabled()
+            
             while self.running:
-                new_candle = self.data_collector.update()
+                # Sleep until a candle closes or the next status update is due
+                try:
+                    await asyncio.wait_for(self.data_collector.new_candle_event.wait(),
+                                           timeout=self._status_timeout())
+                except asyncio.TimeoutError:
+                    self._notify('status')
+                    self.last_discord_update = time.time()
+                    continue
+                self.data_collector.new_candle_event.clear()
                 
                 if not self.trading_enabled:
-                    candle_count = len(self.data_collector.candles)
+                    candle_count = len(self.data_collector)
                     if candle_count > 0 and candle_count % 5 == 0:
-                        print(f"   Progress: {candle_count}/{self.config['MIN_CANDLES_REQUIRED']} candles...")
-                    
-                    if self.data_collector.has_minimum_candles(self.config['MIN_CANDLES_REQUIRED']):
-                        print("\n" + "="*70)
-                        print("✅ TRADING ENABLED")
-                        print("="*70 + "\n")
-                        
-                        self.trading_enabled = True
-                        self.signal_detector = SignalDetector(self.config)
-                        
-                        if self.discord:
-                            await self.discord.send_trading_enabled(len(self.data_collector.candles))
+                        log.info("   Progress: %d/%d candles...", candle_count, self.config['MIN_CANDLES_REQUIRED'])
+                    self._check_trading_enabled()
                 
-                if self.trading_enabled and new_candle:
+                if self.trading_enabled:
                     await self.on_new_candle()
-                
-                if self.discord and self.trading_enabled:
-                    if time.time() - self.last_discord_update > self.config.get('DISCORD_UPDATE_INTERVAL', 300):
-                        await self.send_status_update()
-                        self.last_discord_update = time.time()
-                
-                await asyncio.sleep(self.config['DATA_CHECK_INTERVAL'])
-                
-        except KeyboardInterrupt:
-            print("\n⚠️  Shutting down...")
+        
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl+C into a cancellation of this task
+            log.warning("\n⚠️  Shutting down...")
+            raise
+        finally:
             await self.stop()
     
-    async def on_new_candle(self):
-        """Process new completed candle"""
-        df = self.data_collector.get_dataframe()
-        
-        if df is None or len(df) < 100:
+    def _check_trading_enabled(self):
+        """Enable trading once every symbol has the minimum history"""
+        if self.trading_enabled:
             return
+        if not self.data_collector.has_minimum_candles(self.config['MIN_CANDLES_REQUIRED']):
+            return
+        
+        log.info("\n" + "="*70)
+        log.info("✅ TRADING ENABLED")
+        log.info("="*70 + "\n")
+        
+        self.trading_enabled = True
+        self.signal_detectors = {sym: SignalDetector(self.config) for sym in self.symbols}
         
+        self._notify('enabled', len(self.data_collector))
+        self.last_discord_update = time.time()
+    
+    def _status_timeout(self):
+        """Seconds until the next Discord status update, None when none are sent"""
+        if not (self.discord and self.trading_enabled):
+            return None
+        interval = self.config.get('DISCORD_UPDATE_INTERVAL', 300)
+        return max(0.0, self.last_discord_update + interval - time.time())
+    
+    def _update_indicators(self, symbol, series):
+        """Fold a symbol's candles not seen yet into its running indicator state"""
+        indicators = self.indicators[symbol]
+        buf = series.buf
+        n = series.n
+        
+        if self._indicator_rows[symbol] == 0 and n > 1:
+            # Backfilled history: one kernel pass, then continue incrementally
+            start = 0
+            columns = indicators.seed(buf['open'][:n], buf['high'][:n],
+                                      buf['low'][:n], buf['close'][:n])
+            series.set_values(slice(0, n), **columns)
+        else:
+            # _indicator_rows counts all candles seen, buffer rows start after the dropped ones
+            start = max(self._indicator_rows[symbol] - series.dropped, 0)
+            for i in range(start, n):
+                values = indicators.update(buf['open'][i], buf['high'][i],
+                                           buf['low'][i], buf['close'][i])
+                series.set_values(i, **values)
+        self._indicator_rows[symbol] = series.total_candles
+        
+        if n:
+            last = series.window(1)
+            state = self.state[symbol]
+            state.price = float(last['close'][0])
+            for k in IncrementalIndicators.COLUMNS:
+                setattr(state, k, float(last[k][0]))
+            state.ts = last['ts'][0]
+            state.bar = series.total_candles - 1
+            state.history = len(series)
+        return start
+    
+    def _process_candle(self, symbol, series):
+        """CPU-bound part of candle processing, returns (first row updated, signals)"""
+        seeded = self._indicator_rows[symbol] == 0
         try:
-            df['rsi'] = IndicatorCalculator.calculate_rsi(df['close'], self.config['RSI_PERIOD'])
-            df['atr'] = IndicatorCalculator.calculate_atr(df, self.config['ATR_PERIOD'])
-            df['ema20'] = IndicatorCalculator.calculate_ema(df['close'], self.config['EMA_FAST'])
-            df['ema50'] = IndicatorCalculator.calculate_ema(df['close'], self.config['EMA_MID'])
-            df['ema100'] = IndicatorCalculator.calculate_ema(df['close'], self.config['EMA_SLOW'])
+            start = self._update_indicators(symbol, series)
         except Exception as e:
-            print(f"⚠️  Indicator error: {e}")
+            log.warning("⚠️  Indicator error: %s", e)
+            return None, []
+        
+        state = self.state[symbol]
+        if state.ts is None:
+            return start, []
+        
+        if log.isEnabledFor(logging.INFO):
+            log.info("[%s] %s $%s | RSI: %.1f", state.ts, symbol, f"{state.price:,.2f}", state.rsi)
+        
+        detector = self.signal_detectors.get(symbol)
+        if not detector:
+            return start, []
+        
+        # One detector pass per newly folded bar so a catch-up can't skip pivots.
+        # Backfilled history is only checked at its newest bar, like a live start
+        signals = []
+        for i in range(series.n - 1 if seeded else start, series.n - 1):
+            bar = SimpleNamespace(bar=series.dropped + i, history=min(i + 1, series.max_history))
+            signal = detector.detect_signal_fast(bar, series.window(self.detect_window, i + 1))
+            if signal:
+                signals.append(signal)
+        signal = detector.detect_signal_fast(state, series.window(self.detect_window))
+        if signal:
+            signals.append(signal)
+        return start, signals
+    
+    @staticmethod
+    def _copy_indicator_rows(src, dst, start):
+        """Carry indicator rows written into src's buffers over to dst's compacted ones"""
+        shift = dst.dropped - src.dropped
+        lo = max(start, shift)
+        if lo < src.n:
+            for k in IncrementalIndicators.COLUMNS:
+                dst.buf[k][lo - shift:src.n - shift] = src.buf[k][lo:src.n]
+    
+    async def on_new_candle(self):
+        """Process new completed candles for every symbol that has one"""
+        for symbol, series in self.data_collector.series.items():
+            if series.total_candles > self._indicator_rows[symbol]:
+                await self.on_symbol_candle(symbol)
+    
+    async def on_symbol_candle(self, symbol):
+        """Process a symbol's new completed candle"""
+        series = self.data_collector.series[symbol]
+        # Frozen view for the worker thread, the stream keeps appending to series meanwhile
+        snapshot = copy.copy(series)
+        try:
+            start, signals = await asyncio.to_thread(self._process_candle, symbol, snapshot)
+        except Exception as e:
+            log.warning("⚠️  Signal error: %s", e)
             return
         
-        current_price = df['close'].iloc[-1]
-        current_rsi = df['rsi'].iloc[-1]
-        current_time = df.index[-1]
+        if start is not None and series.buf is not snapshot.buf:
+            self._copy_indicator_rows(snapshot, series, start)
+        
+        for signal in signals:
+            signal['symbol'] = symbol
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n%s\n🚨 SIGNAL DETECTED!\n%s\n"
+                         "  Symbol: %s\n  Type: %s\n  Confidence: %.0f%%\n  Price: $%s\n  RSI: %.1f\n%s\n",
+                         "="*70, "="*70, symbol, signal['type'], signal['confidence'] * 100,
+                         f"{signal['price']:,.2f}", signal['rsi'], "="*70)
+            
+            self._notify('signal', signal)
+            
+            if self.config['LOG_SIGNALS_ONLY']:
+                log.info("  [LOG ONLY - No trade]\n")
+    
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking SDK call on the worker pool without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+    
+    async def _timed(self, coro, name):
+        """Await a network call for at most net_timeout seconds, None if it timed out"""
+        try:
+            return await asyncio.wait_for(coro, self.net_timeout)
+        except asyncio.TimeoutError:
+            log.warning("⚠️  %s timed out after %gs", name, self.net_timeout)
+            return None
+    
+    async def _fetch_account_snapshot(self):
+        """Fetch account and positions concurrently, cached for account_cache_ttl"""
+        if self._account_cache and time.time() - self._account_cache_time < self.account_cache_ttl:
+            return self._account_cache
         
-        print(f"[{current_time}] ${current_price:,.2f} | RSI: {current_rsi:.1f}")
+        # HTTP-level timeouts and connection errors surface as exceptions, not None
+        results = await asyncio.gather(
+            self._timed(self._run_blocking(self.trading_client.get_account), "Alpaca get_account"),
+            self._timed(self._run_blocking(self.trading_client.get_all_positions), "Alpaca get_all_positions"),
+            return_exceptions=True
+        )
+        for e in results:
+            if isinstance(e, Exception):
+                log.warning("⚠️  Account snapshot failed: %s", e)
+        account, positions = results
+        if any(r is None or isinstance(r, Exception) for r in results):
+            # Fall back to the last snapshot, however old
+            return self._account_cache
         
-        if self.signal_detector:
+        self._account_cache = (account, positions)
+        self._account_cache_time = time.time()
+        return self._account_cache
+    
+    def _notify(self, kind, payload=None):
+        """Queue a Discord notification without waiting for it to be sent"""
+        if self.discord:
+            self._notify_q.put_nowait((kind, payload, time.time()))
+    
+    async def _notifier_loop(self):
+        """Drain queued notifications, sending bursts together"""
+        while True:
+            batch = [await self._notify_q.get()]
+            while not self._notify_q.empty() and len(batch) < self.NOTIFY_BATCH:
+                batch.append(self._notify_q.get_nowait())
+            
             try:
-                signal = self.signal_detector.detect_signal(df)
-                
-                if signal:
-                    print(f"\n{'='*70}")
-                    print(f"🚨 SIGNAL DETECTED!")
-                    print(f"{'='*70}")
-                    print(f"  Type: {signal['type']}")
-                    print(f"  Confidence: {signal['confidence']:.0%}")
-                    print(f"  Price: ${signal['price']:,.2f}")
-                    print(f"  RSI: {signal['rsi']:.1f}")
-                    print(f"{'='*70}\n")
-                    
-                    if self.discord:
-                        try:
-                            account = self.trading_client.get_account()
-                            await self.discord.send_signal(signal, float(account.equity))
-                        except:
-                            pass
-                    
-                    if self.config['LOG_SIGNALS_ONLY']:
-                        print("  [LOG ONLY - No trade]\n")
+                await self._send_notifications(batch)
             except Exception as e:
-                print(f"⚠️  Signal error: {e}")
+                log.warning("⚠️  Discord notification failed: %s", e)
+    
+    async def _send_notifications(self, batch):
+        """Send one drained batch of notifications"""
+        now = time.time()
+        
+        for kind, payload, _ in batch:
+            if kind == 'enabled':
+                await self._timed(self.discord.send_trading_enabled(payload), "Discord trading-enabled message")
+        
+        # Signals that waited out an outage are stale, drop them
+        queued = [(payload, queued_at) for kind, payload, queued_at in batch if kind == 'signal']
+        signals = [payload for payload, queued_at in queued if now - queued_at <= self.NOTIFY_MAX_AGE]
+        if len(signals) < len(queued):
+            log.warning("⚠️  Dropped %d stale signal(s) queued over %ds ago",
+                        len(queued) - len(signals), self.NOTIFY_MAX_AGE)
+        if signals:
+            snapshot = await self._fetch_account_snapshot()
+            if snapshot is None:
+                log.warning("⚠️  No account snapshot, %d signal(s) not sent", len(signals))
+            elif len(signals) == 1:
+                await self._timed(self.discord.send_signal(signals[0], float(snapshot[0].equity)),
+                                  "Discord signal")
+            else:
+                await self._timed(self.discord.send_signals(signals, float(snapshot[0].equity)),
+                                  "Discord signals")
+        
+        if any(kind == 'status' for kind, _, _ in batch):
+            await self.send_status_update()
     
     async def send_status_update(self):
         """Send periodic status update to Discord"""
@@ -165,27 +394,35 @@ class IntegratedLiveTrader:
             return
         
         try:
-            account = self.trading_client.get_account()
-            positions = self.trading_client.get_all_positions()
-            await self.discord.send_account_update(account, positions)
+            snapshot = await self._fetch_account_snapshot()
+            if snapshot:
+                await self._timed(self.discord.send_account_update(*snapshot), "Discord status update")
         except Exception as e:
-            print(f"⚠️  Discord update failed: {e}")
+            log.warning("⚠️  Discord update failed: %s", e)
     
     async def stop(self):
         """Gracefully stop bot"""
         self.running = False
         
+        await self.data_collector.stop_collection()
+        self._executor.shutdown(wait=False)
+        
+        if self._notifier_task:
+            self._notifier_task.cancel()
+            self._notifier_task = None
+        
         if self.discord:
             try:
-                await self.discord.close()
+                await self._timed(self.discord.close(), "Discord close")
             except:
                 pass
         
-        print("\n✓ Bot stopped")
+        log.info("\n✓ Bot stopped")
 
 
-async def main():
+async def main(quiet=False):
     """Main entry point"""
+    setup_logging(CONFIG, quiet)
     print("""
 ╔══════════════════════════════════════════════════════════════════════╗
 ║          BZ-CAE LIVE TRADING BOT v3.0 - ALL BUGS FIXED               ║
@@ -197,8 +434,13 @@ async def main():
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="BZ-CAE live trading bot")
+    parser.add_argument('--quiet', action='store_true', help="don't log to the console")
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(main())
+        asyncio.run(main(quiet=args.quiet))
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
     except Exception as e:
@@ -1,6 +1,10 @@
+import logging
 import pandas as pd
+from types import SimpleNamespace
 from indicator_calculator import IndicatorCalculator
 
+log = logging.getLogger('bzcae')
+
 
 class SignalDetector:
     """Detects divergence signals with BZ-CAE validation"""
@@ -11,15 +15,15 @@ class SignalDetector:
         self.last_signal_time = None
         self.signal_cooldown_bars = 10
     
-    def calculate_confidence(self, df, index, is_bullish):
-        """Calculate BZ-CAE confidence score"""
+    def calculate_confidence(self, window, index, is_bullish):
+        """Calculate BZ-CAE confidence score from a window of column arrays"""
         try:
-            rsi = df['rsi'].iloc[index]
-            close = df['close'].iloc[index]
-            ema20 = df['ema20'].iloc[index]
-            ema50 = df['ema50'].iloc[index]
-            ema100 = df['ema100'].iloc[index]
-            atr = df['atr'].iloc[index]
+            rsi = window['rsi'][index]
+            close = window['close'][index]
+            ema20 = window['ema20'][index]
+            ema50 = window['ema50'][index]
+            ema100 = window['ema100'][index]
+            atr = window['atr'][index]
             
             if pd.isna(rsi) or pd.isna(atr) or atr == 0:
                 return 0.0
@@ -71,40 +75,51 @@ class SignalDetector:
             return min(confidence, 1.0)
             
         except Exception as e:
-            print(f"Error calculating confidence: {e}")
+            log.warning("Error calculating confidence: %s", e)
             return 0.0
     
-    def detect_signal(self, df):
+    def detect_signal(self, df, base_index=0):
         """Check for new divergence signals"""
-        if len(df) < 100:
+        # base_index is the absolute bar number of df's first row, so pivot and
+        # cooldown indices stay valid once old history is trimmed
+        state = SimpleNamespace(bar=base_index + len(df) - 1, history=len(df))
+        window = {k: df[k].to_numpy() for k in df.columns}
+        window['ts'] = df.index
+        return self.detect_signal_fast(state, window)
+    
+    def detect_signal_fast(self, state, window):
+        """Check for new divergence signals from the latest state and a short window"""
+        # state.bar is the absolute bar number of the window's last row and
+        # state.history the candles available; window needs 2*lookback+1 rows
+        if state.history < 100:
             return None
         
         # Cooldown check
         if self.last_signal_time:
-            bars_since_signal = len(df) - self.last_signal_time
+            bars_since_signal = state.bar + 1 - self.last_signal_time
             if bars_since_signal < self.signal_cooldown_bars:
                 return None
         
         lookback = self.config['PIVOT_LOOKBACK']
-        check_index = len(df) - lookback - 1
+        check_index = len(window['high']) - lookback - 1
         
         if check_index < lookback:
             return None
         
         # Check pivots
-        is_pivot_high = IndicatorCalculator.find_pivot_high(df['high'], check_index, lookback)
-        is_pivot_low = IndicatorCalculator.find_pivot_low(df['low'], check_index, lookback)
+        is_pivot_high = IndicatorCalculator.find_pivot_high(window['high'], check_index, lookback)
+        is_pivot_low = IndicatorCalculator.find_pivot_low(window['low'], check_index, lookback)
         
         if not is_pivot_high and not is_pivot_low:
             return None
         
         # Store pivot
         pivot = {
-            'index': check_index,
+            'index': state.bar - lookback,
             'type': 'high' if is_pivot_high else 'low',
-            'price': df['high'].iloc[check_index] if is_pivot_high else df['low'].iloc[check_index],
-            'rsi': df['rsi'].iloc[check_index],
-            'time': df.index[check_index]
+            'price': window['high'][check_index] if is_pivot_high else window['low'][check_index],
+            'rsi': window['rsi'][check_index],
+            'time': window['ts'][check_index]
         }
         
         self.recent_pivots.append(pivot)
@@ -112,7 +127,7 @@ class SignalDetector:
         # Keep only recent pivots
         max_lookback = self.config['MAX_LOOKBACK_BARS']
         self.recent_pivots = [p for p in self.recent_pivots 
-                              if check_index - p['index'] <= max_lookback]
+                              if pivot['index'] - p['index'] <= max_lookback]
         
         # Look for divergence
         for prev_pivot in reversed(self.recent_pivots[:-1]):
@@ -129,17 +144,17 @@ class SignalDetector:
                 pivot['rsi'] > prev_pivot['rsi'] and
                 pivot['rsi'] < 40):
                 
-                confidence = self.calculate_confidence(df, check_index, is_bullish=True)
+                confidence = self.calculate_confidence(window, check_index, is_bullish=True)
                 
                 if confidence >= self.config['MIN_CONFIDENCE']:
-                    self.last_signal_time = check_index
+                    self.last_signal_time = pivot['index']
                     return {
                         'type': 'BULLISH',
                         'time': pivot['time'],
                         'price': pivot['price'],
                         'rsi': pivot['rsi'],
                         'confidence': confidence,
-                        'atr': df['atr'].iloc[check_index],
+                        'atr': window['atr'][check_index],
                         'bars_between': bars_between
                     }
             
@@ -149,17 +164,17 @@ class SignalDetector:
                   pivot['rsi'] < prev_pivot['rsi'] and
                   pivot['rsi'] > 60):
                 
-                confidence = self.calculate_confidence(df, check_index, is_bullish=False)
+                confidence = self.calculate_confidence(window, check_index, is_bullish=False)
                 
                 if confidence >= self.config['MIN_CONFIDENCE']:
-                    self.last_signal_time = check_index
+                    self.last_signal_time = pivot['index']
                     return {
                         'type': 'BEARISH',
                         'time': pivot['time'],
                         'price': pivot['price'],
                         'rsi': pivot['rsi'],
                         'confidence': confidence,
-                        'atr': df['atr'].iloc[check_index],
+                        'atr': window['atr'][check_index],
                         'bars_between': bars_between
                     }
         
@@ -1,4 +1,12 @@
+import logging
+import sys
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger('bzcae')
+
 
 def load_keys():
     """Load Alpaca keys from keys.env file"""
@@ -33,4 +41,55 @@ def load_all_keys():
                 key, value = line.split('=', 1)
                 keys[key.strip()] = value.strip()
     
-    return keys
\ No newline at end of file
+    return keys
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests sent without one"""
+    
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure_http_pool(client, pool_connections=16, pool_maxsize=32, timeout=None):
+    """Mount a larger keep-alive pool with retries (and a request timeout) on an Alpaca REST client"""
+    session = getattr(client, '_session', None)
+    if session is None:
+        log.warning("⚠ %s has no _session, HTTP pool and timeout not applied", type(client).__name__)
+        return
+    
+    # Retry's default allowed_methods excludes POST, so orders are never resent.
+    # The SDK already retries 429 and 504 itself, so leave those to it
+    retry = Retry(total=3, backoff_factor=0.25,
+                  status_forcelist=[500, 502, 503],
+                  raise_on_status=False)
+    adapter = TimeoutHTTPAdapter(pool_connections=pool_connections,
+                                 pool_maxsize=pool_maxsize,
+                                 max_retries=retry,
+                                 timeout=timeout)
+    session.mount('https://', adapter)
+
+
+def setup_logging(config, quiet=False):
+    """Configure the bot logger: rotating file plus console unless quiet"""
+    log.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    log.propagate = False
+    
+    if config.get('LOG_FILE'):
+        file_handler = RotatingFileHandler(config['LOG_FILE'], maxBytes=5_000_000, backupCount=3)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        log.addHandler(file_handler)
+    
+    if not quiet:
+        log.addHandler(logging.StreamHandler(sys.stdout))
+    
+    if not log.handlers:
+        log.addHandler(logging.NullHandler())
+    
+    return log
\ No newline at end of file